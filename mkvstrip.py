@@ -20,25 +20,58 @@
 
 __version__ = "1.0.0"
 
-from functools import lru_cache
-from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor
+from collections import defaultdict
+from operator import attrgetter
 from pymediainfo import MediaInfo
+import multiprocessing
 import subprocess
+import contextlib
 import argparse
-import itertools
+import unicodedata
+import hashlib
+import signal
+import tempfile
+import sqlite3
+import shutil
 import time
 import json
 import sys
+import io
 import os
 
+# Use the faster orjson decoder for the mediainfo cache when available
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
 # Global parser namespace
 cli_args = None
 
+# Lock guarding stdout when processing files in parallel
+output_lock = None
+
+# Connection to the mediainfo cache database, opened on first use
+media_cache = None
+
 MEDIAINFO_DEFAULT = "mediainfo"
 MKVEXTRACT_DEFAULT = "mkvextract"
 MKVMERGE_DEFAULT = "mkvmerge"
 MKVPROPEDIT_DEFAULT = "mkvpropedit"
 MIN_AGE_DEFAULT = 0
+JOBS_DEFAULT = max(1, (os.cpu_count() or 1) // 2)
+CACHE_DIR_DEFAULT = os.path.join(os.path.expanduser("~"), ".cache", "mkvstrip")
+
+# The track attributes that are used, only these are kept in the mediainfo cache
+TRACK_ATTRIBUTES = ("track_type", "track_id", "streamorder", "title", "language", "other_language", "forced",
+                    "format", "commercial_name", "codec_id", "stream_size", "attachments", "duration_source",
+                    "framecount_source", "samplingcount_source")
+
+# Track attributes that can depend on scanning the streams themselves, when any
+# of them is missing after the fast parse the file is parsed again in full
+FULL_PARSE_ATTRIBUTES = {"Video": ("duration_source", "framecount_source"),
+                         "Audio": ("duration_source", "samplingcount_source", "stream_size")}
 
 def catch_interrupt(func):
     """Decorator to catch Keyboard Interrupts and silently exit."""
@@ -52,21 +85,53 @@ def catch_interrupt(func):
     return wrapper
 
 
+def _iter_mkv(path):
+    """
+    Scan the given directory tree for mkv files, in sorted order.
+
+    :param str path: Path to Directory to scan.
+
+    :return: Generator of directory entries for every mkv file found.
+    :rtype: collections.Iterator[os.DirEntry]
+    """
+    stack = [path]
+    while stack:
+        # Unreadable or vanished directories are skipped, just like os.walk does
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = sorted(it, key=attrgetter("name"))
+        except OSError:
+            continue
+
+        # Files of the current directory are processed before any sub directories
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file() and entry.name.lower().endswith(".mkv"):
+                yield entry
+
+        # Sub directories are pushed in reverse, so they are popped in sorted order
+        stack.extend(reversed(subdirs))
+
+
 def walk_directory(path):
     """
     Walk through the given directory to find all mkv files and process them.
 
     :param str path: Path to Directory containing mkv files.
 
-    :return: List of processed mkv files.
-    :rtype: list[str]
+    :return: Generator of mkv files to process.
+    :rtype: collections.Iterator[str]
     """
-    movie_list = []
+    # Without a minimal age every file qualifies, so there is no need to stat them
+    check_age = cli_args.min_age != 0
+    cutoff = time.time() - cli_args.min_age * 3600
     if os.path.isfile(path):
         if path.lower().endswith(".mkv"):
             if not "[edited]" in path:
-                if os.stat(path).st_mtime <= time.time() - cli_args.min_age * 3600:
-                    movie_list.append(path)
+                if not check_age or os.stat(path).st_mtime <= cutoff:
+                    yield path
                 else:
                     print("Ignoring: {} - File does not meet minimal age criteria.".format(path))
             else:
@@ -75,38 +140,19 @@ def walk_directory(path):
             raise ValueError("Given file is not a valid mkv file: '%s'" % path)
 
     elif os.path.isdir(path):
-        dirs = []
-        # Walk through the directory
-        for dirpath, _, filenames in os.walk(path):
-            files = []
-            for filename in filenames:
-                if filename.lower().endswith(".mkv"):
-                    files.append(filename)
-
-            # Sort list of files and add to directory list
-            dirs.append((dirpath, sorted(files)))
-
-        # Sort the list of directorys & files and process them
-        for dirpath, filenames in sorted(dirs, key=itemgetter(0)):
-            for filename in filenames:
-                fullpath = os.path.join(dirpath, filename)
-                if not "[edited]" in fullpath:
-                    if os.stat(fullpath).st_mtime <= time.time() - cli_args.min_age * 3600:
-                        movie_list.append(fullpath)
-                    else:
-                        print("Ignoring: {} - File does not meet minimal age criteria.".format(fullpath))
+        # Files are yielded as soon as they are found so that
+        # processing can start before the whole tree is scanned
+        for entry in _iter_mkv(path):
+            fullpath = entry.path
+            if not "[edited]" in fullpath:
+                if not check_age or entry.stat().st_mtime <= cutoff:
+                    yield fullpath
                 else:
-                    print("Ignoring: {} - File has already been edited.".format(fullpath))
+                    print("Ignoring: {} - File does not meet minimal age criteria.".format(fullpath))
+            else:
+                print("Ignoring: {} - File has already been edited.".format(fullpath))
     else:
         raise FileNotFoundError("[Errno 2] No such file or directory: '%s'" % path)
-    
-    print("\nFiles to process:")
-    print("============================")
-    for path in movie_list:
-        print(path)
-    print("============================")
-    
-    return movie_list
 
 
 def edit_file(command):
@@ -129,32 +175,35 @@ def edit_file(command):
             print("============================")
         return False
     
-    if command[0] != cli_args.mkvpropedit:
+    # Progress is only displayed when processing one file at a time,
+    # the output of parallel jobs is buffered until the file is processed
+    show_progress = cli_args.jobs <= 1
+    if show_progress and command[0] != cli_args.mkvpropedit:
         sys.stdout.write("Progress 0%")
         sys.stdout.flush()
 
     try:
-        # Call subprocess command to edit file
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, universal_newlines=True)
-
-        # Display Percentage until subprocess has finished
-        retcode = process.poll()
-        while retcode is None:
-            # Sleep for a quarter second and then dislay progress
-            time.sleep(.25)
-            if command[0] != cli_args.mkvpropedit:
-                for line in iter(process.stdout.readline, ""):
-                    if "progress" in line.lower():
-                        sys.stdout.write("\r%s" % line.strip())
-                        sys.stdout.flush()
-
-                # Check return code of subprocess
-            retcode = process.poll()
+        if command[0] == cli_args.mkvpropedit:
+            # mkvpropedit reports no progress, so its output is discarded
+            retcode = subprocess.call(command, stdout=subprocess.DEVNULL)
+        else:
+            # Call subprocess command to edit file
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=1, universal_newlines=True)
+
+            # Display Percentage as it is reported, until the subprocess closes its output
+            for line in process.stdout:
+                if show_progress and "progress" in line.lower():
+                    sys.stdout.write("\r%s" % line.strip())
+                    sys.stdout.flush()
+
+            # Wait for the subprocess to finish
+            retcode = process.wait()
 
         # Check if return code indicates an error
-        sys.stdout.write("\n")
+        if show_progress:
+            sys.stdout.write("\n")
         if retcode:
-            raise subprocess.CalledProcessError(retcode, command, output=process.stdout)
+            raise subprocess.CalledProcessError(retcode, command)
 
     except subprocess.CalledProcessError as e:
         print("Subprocess failed!")
@@ -168,6 +217,52 @@ def edit_file(command):
         return True
 
 
+def start_edit(command):
+    """
+    Start editing a mkv file in the background, without reporting any progress.
+
+    :param list command: The list of command parameters to pass to the editing app.
+
+    :return: The running subprocess along with the file capturing its output, or None if in dry run mode.
+    :rtype: tuple
+    """
+    if cli_args.verbose:
+        print("\nCommand:")
+        print(command)
+
+    if cli_args.dry_run:
+        return None
+
+    # The output is kept in a temporary file, so that it can be reported if the edit fails
+    output = tempfile.TemporaryFile()
+    return subprocess.Popen(command, stdout=output, stderr=subprocess.STDOUT), output
+
+
+def finish_edit(process, output):
+    """
+    Wait for an edit that was started in the background to finish.
+
+    :param subprocess.Popen process: The subprocess returned by start_edit.
+    :param output: The file capturing the output of the subprocess.
+
+    :return: Boolean indicating if edit was successful.
+    :rtype: bool
+    """
+    with output:
+        retcode = process.wait()
+        if retcode:
+            output.seek(0)
+            print("Subprocess failed!")
+            print(output.read().decode("utf8", "replace").rstrip())
+            print(subprocess.CalledProcessError(retcode, process.args))
+            return False
+        elif process.args[0] == cli_args.mkvextract:
+            print("Extracted stream(s) succesfully")
+        else:
+            print("Edited file successfully")
+        return True
+
+
 def replace_file(tmp_file, org_file):
     """
     Replaces the original mkv file with the newly remuxed temp file.
@@ -179,41 +274,58 @@ def replace_file(tmp_file, org_file):
     edit_suffix = org_file[(org_file.index("]") + 1):]
     edit_file = "{}[edited]{}".format(edit_title, edit_suffix)
     dirpath, filename = os.path.split(org_file)
-    filename_nosuffix = filename[:-4]
+    filename_nosuffix = filename[:-4].lower()
     
-    # Preserve timestamp
-    stat = os.stat(org_file)
-    os.utime(tmp_file, (stat.st_atime, stat.st_mtime))
-    
-    for file in os.listdir(dirpath):
-            if os.path.isfile(os.path.join(dirpath, file)) and file.lower().endswith(".srt") and file.lower().startswith(filename_nosuffix.lower()) and not "[edited]" in file:
-                title = file[:(file.index("]") + 1)]
-                suffix = file[(file.index("]") + 1):]
-                new_file = "{}[edited]{}".format(title, suffix)
-                try:
-                    os.rename(os.path.join(dirpath, file), os.path.join(dirpath, new_file))
-                    print("Renamed: %s => %s" % (file, new_file))
-                except EnvironmentError as e:
-                    print("Renaming failed: %s => %s" % (file, new_file))
-                    print(e)    
+    # Preserve timestamp, a file that was edited in place already has it
+    if tmp_file != org_file:
+        stat = os.stat(org_file)
+        os.utime(tmp_file, (stat.st_atime, stat.st_mtime))
+
+    # Find the external subtitles belonging to this file, before renaming any of them
+    with os.scandir(dirpath) as it:
+        subtitles = [entry.name for entry in it if entry.name.lower().endswith(".srt") and
+                     entry.name.lower().startswith(filename_nosuffix) and
+                     not "[edited]" in entry.name and entry.is_file()]
+
+    for file in subtitles:
+        title = file[:(file.index("]") + 1)]
+        suffix = file[(file.index("]") + 1):]
+        new_file = "{}[edited]{}".format(title, suffix)
+        try:
+            os.rename(os.path.join(dirpath, file), os.path.join(dirpath, new_file))
+            print("Renamed: %s => %s" % (file, new_file))
+        except EnvironmentError as e:
+            print("Renaming failed: %s => %s" % (file, new_file))
+            print(e)    
     
     # Overwrite original file
     try:
         if org_file == tmp_file:
             os.rename(tmp_file, edit_file)
-            print("Renamed: %s => %s" % (tmp_file, edit_file))
-            print("============================")
         else:
-            os.unlink(org_file)
-            print("Deleted: %s" % (org_file))
-            os.rename(tmp_file, edit_file)
-            print("Renamed: %s => %s" % (tmp_file, edit_file))
-            print("============================")
+            # Move the remuxed file into place before deleting the original, so the original is
+            # kept if this fails. This copies the file if the temp dir is on another filesystem
+            shutil.move(tmp_file, edit_file)
     except EnvironmentError as e:
-        if not org_file == tmp_file:
+        if not org_file == tmp_file and os.path.exists(tmp_file):
             os.unlink(tmp_file)
+            # Remove any partial copy, the original file is still intact
+            if os.path.exists(edit_file):
+                os.unlink(edit_file)
         print("Renaming failed: %s => %s" % (tmp_file, edit_file))
         print(e)
+        return
+
+    print("Renamed: %s => %s" % (tmp_file, edit_file))
+    uncache_media_info(org_file)
+    if not org_file == tmp_file:
+        try:
+            os.unlink(org_file)
+            print("Deleted: %s" % (org_file))
+        except EnvironmentError as e:
+            print("Deleting failed: %s" % (org_file))
+            print(e)
+    print("============================")
 
 
 class AppendSplitter(argparse.Action):
@@ -236,6 +348,149 @@ class RealPath(argparse.Action):
         setattr(namespace, self.dest, os.path.realpath(value))
 
 
+class CachedTrack(object):
+    """
+    Lightweight stand-in for a pymediainfo Track, restored from the mediainfo cache.
+    Like pymediainfo, any attribute that is not available returns None.
+
+    :param dict data: The track attributes.
+    """
+    def __init__(self, data):
+        self.__dict__.update(data)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return None
+
+
+def _parse_tracks(path):
+    """
+    Parse the given media file with mediainfo.
+
+    Matroska files store the track metadata in the header, so the file is
+    first parsed at the fastest parse speed. A full parse is only done when
+    fields that can depend on scanning the streams themselves are missing.
+
+    :param str path: Path to the media file.
+
+    :return: List of track attribute dictionaries.
+    :rtype: list[dict]
+    """
+    tracks = MediaInfo.parse(path, parse_speed=0).tracks
+    if any(getattr(track, name) is None for track in tracks
+           for name in FULL_PARSE_ATTRIBUTES.get(track.track_type, ())):
+        tracks = MediaInfo.parse(path).tracks
+
+    # Unavailable attributes are left out, CachedTrack returns None for them
+    return [{name: getattr(track, name) for name in TRACK_ATTRIBUTES if getattr(track, name) is not None}
+            for track in tracks]
+
+
+def _media_cache():
+    """
+    Return the connection to the mediainfo cache database, opening it on first use.
+
+    :return: The cache database, or None if it could not be opened.
+    :rtype: sqlite3.Connection
+    """
+    if media_cache is None:
+        try:
+            os.makedirs(cli_args.cache_dir, exist_ok=True)
+            db = sqlite3.connect(os.path.join(cli_args.cache_dir, "mediainfo.sqlite"), timeout=60)
+            db.execute("CREATE TABLE IF NOT EXISTS mediainfo (path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, json TEXT)")
+        except (EnvironmentError, sqlite3.Error) as e:
+            print("Failed to open mediainfo cache:", e)
+            db = False
+
+        globals()["media_cache"] = db
+    return media_cache or None
+
+
+def parse_media_info(path):
+    """
+    Parse the tracks contained within the given media file.
+
+    Results are cached in a database, keyed by the path of the file. The modification
+    time and size are stored alongside, so the cache is invalidated when the file changes.
+
+    :param str path: Path to the media file.
+
+    :return: List of tracks contained within the media file.
+    :rtype: list[CachedTrack]
+    """
+    stat = os.stat(path)
+    db = _media_cache()
+    row = None
+    if db:
+        try:
+            row = db.execute("SELECT json FROM mediainfo WHERE path = ? AND mtime = ? AND size = ?",
+                             (path, stat.st_mtime_ns, stat.st_size)).fetchone()
+        except (sqlite3.Error, UnicodeEncodeError) as e:
+            print("Failed to read mediainfo cache:", e)
+
+    if row:
+        tracks = json_loads(row[0])
+    else:
+        tracks = _parse_tracks(path)
+        if db:
+            try:
+                with db:
+                    db.execute("INSERT OR REPLACE INTO mediainfo VALUES (?, ?, ?, ?)",
+                               (path, stat.st_mtime_ns, stat.st_size, json.dumps(tracks)))
+            except (sqlite3.Error, UnicodeEncodeError) as e:
+                print("Failed to cache mediainfo results:", e)
+
+    return [CachedTrack(data) for data in tracks]
+
+
+def uncache_media_info(path):
+    """
+    Remove the cached tracks of the given media file.
+
+    Edited files are renamed and never parsed again under their old path,
+    so their cache entries would otherwise be kept forever.
+
+    :param str path: Path to the media file.
+    """
+    db = _media_cache()
+    if db:
+        try:
+            with db:
+                db.execute("DELETE FROM mediainfo WHERE path = ?", (path,))
+        except (sqlite3.Error, UnicodeEncodeError) as e:
+            print("Failed to update mediainfo cache:", e)
+
+
+def _same_title(title, expected):
+    """
+    Check if a title matches the expected title, ignoring any
+    surrounding whitespace and differences in unicode normalization.
+
+    :param str title: The title to check.
+    :param str expected: The expected title.
+
+    :return: Return True if the titles match else False
+    :rtype: bool
+    """
+    if title is None or expected is None:
+        return title == expected
+    return unicodedata.normalize("NFC", str(title).strip()) == unicodedata.normalize("NFC", str(expected).strip())
+
+
+def _subtitle_title(track):
+    """
+    Return the title to give a subtitle track, e.g. "English (Forced)".
+
+    :param Track track: The subtitle track.
+
+    :return: The title for the subtitle track.
+    :rtype: str
+    """
+    return "{}{}{}".format(track.other_language[0], " (Forced)" if track.forced == "Yes" else "",
+                           " (SDH)" if track.title and "sdh" in track.title.lower() else "")
+
+
 class MKVFile(object):
     """
     Extracts track information contained within a Matroska file and
@@ -246,25 +501,31 @@ class MKVFile(object):
     def __init__(self, path):
         self.dirpath, self.filename = os.path.split(path)
         self.path = path
+
+        # Title of the movie, and the parts of the path surrounding the "[edited]" tag
+        self.title = self.filename[:(self.filename.index("[") - 1)]
+        self.edit_prefix = self.path[:(self.path.index("]") + 1)]
+        self.edit_suffix = self.path[(self.path.index("]") + 1):-4]
                
-        media_info = MediaInfo.parse(path)
-        self.general_tracks = media_info.general_tracks
-        self.video_tracks = media_info.video_tracks
-        self.audio_tracks = media_info.audio_tracks
-        self.subtitle_tracks = media_info.text_tracks
-        self.menu_tracks = media_info.menu_tracks
-        self.streamorder_video = []
-        self.streamorder_audio = []
-        self.streamorder_subtitles = []
+        tracks = parse_media_info(path)
+        self.general_tracks = [track for track in tracks if track.track_type == "General"]
+        self.video_tracks = [track for track in tracks if track.track_type == "Video"]
+        self.audio_tracks = [track for track in tracks if track.track_type == "Audio"]
+        self.subtitle_tracks = [track for track in tracks if track.track_type == "Text"]
+        self.menu_tracks = [track for track in tracks if track.track_type == "Menu"]
+        self.streamorder_video = [int(track.streamorder) for track in self.video_tracks]
+        self.streamorder_audio = [int(track.streamorder) for track in self.audio_tracks]
+        self.streamorder_subtitles = [int(track.streamorder) for track in self.subtitle_tracks]
         self.track_order = []
         self.subtitles_forced = []
         self.streams_misaligned = False
 
-    @lru_cache()
-    def _filtered_tracks(self, track_type):
+        # Tracks to keep, remove & extract, per track type
+        self._filtered_tracks = {track_type: self._compute_filtered_tracks(track_type) for track_type in ("Audio", "Text")}
+
+    def _compute_filtered_tracks(self, track_type):
         """
-        Return a tuple consisting of tracks to keep and tracks to remove, if
-        there are indeed tracks that need to be removed, else return False.
+        Return a tuple consisting of tracks to keep grouped by language, tracks to remove and tracks to extract.
 
         Available track types:
             subtitle
@@ -272,19 +533,19 @@ class MKVFile(object):
 
         :param str track_type: The track type to check.
 
-        :return: Tuple of tracks to keep and remove
-        :rtype: tuple[list[Track]]
+        :return: Tuple of tracks to keep by language, and tracks to remove and extract
+        :rtype: tuple[dict[str, list[Track]], list[Track], list[Track]]
         """
         if track_type == 'Audio':
-            languages_to_keep = cli_args.language
+            languages_to_keep = cli_args.language_set
             tracks = self.audio_tracks
         elif track_type == 'Text':
-            languages_to_keep = cli_args.sub_language
+            languages_to_keep = cli_args.sub_language_set
             tracks = self.subtitle_tracks
             
         # Lists of track to keep & remove
         remove = []
-        keep = []
+        keep = defaultdict(list)
         extract = []
         # Iterate over all tracks to find which track to keep or remove
         for track in tracks:
@@ -297,18 +558,18 @@ class MKVFile(object):
                                 if cli_args.external_subtitles:
                                     extract.append(track)
                                 else:
-                                    keep.append(track)
+                                    keep[track.language].append(track)
                             else:
                                 remove.append(track)              
                         else:
                             if cli_args.external_subtitles:
                                 extract.append(track)
                             else:
-                                keep.append(track)
+                                keep[track.language].append(track)
                     else:
                         remove.append(track)     
                 else:
-                    keep.append(track)
+                    keep[track.language].append(track)
             else:
                 remove.append(track)        
         return keep, remove, extract
@@ -322,37 +583,18 @@ class MKVFile(object):
         :rtype: bool
         """
 
-        audio_to_keep, audio_to_remove, audio_to_extract = self._filtered_tracks("Audio")
-        sub_to_keep, sub_to_remove, sub_to_extract = self._filtered_tracks("Text")
+        audio_to_keep, audio_to_remove, audio_to_extract = self._filtered_tracks["Audio"]
+        sub_to_keep, sub_to_remove, sub_to_extract = self._filtered_tracks["Text"]
               
-        for track in self.video_tracks:
-            self.streamorder_video.append(track.streamorder)
-
-        for track in self.audio_tracks:
-            self.streamorder_audio.append(track.streamorder)
-
-        for track in self.subtitle_tracks:
-            self.streamorder_subtitles.append(track.streamorder)
-        
-        for video, audio in itertools.product(self.streamorder_video, self.streamorder_audio):
-            if video > audio:
-                self.streams_misaligned = True
-                print("Misaligned streams detected")
-                break
-        
-        if not self.streams_misaligned:
-            for video, subtitles in itertools.product(self.streamorder_video, self.streamorder_subtitles):
-                if video > subtitles:
-                    self.streams_misaligned = True
-                    print("Misaligned streams detected")
-                    break
-        
-        if not self.streams_misaligned:
-            for audio, subtitles in itertools.product(self.streamorder_audio, self.streamorder_subtitles):
-                if audio > subtitles:
-                    self.streams_misaligned = True
-                    print("Misaligned streams detected")
-                    break
+        # Streams are misaligned when any video stream comes after an audio
+        # or subtitle stream, or any audio stream comes after a subtitle stream
+        video_max = max(self.streamorder_video, default=-1)
+        audio_min = min(self.streamorder_audio, default=float("inf"))
+        audio_max = max(self.streamorder_audio, default=-1)
+        subtitles_min = min(self.streamorder_subtitles, default=float("inf"))
+        self.streams_misaligned = video_max > audio_min or max(video_max, audio_max) > subtitles_min
+        if self.streams_misaligned:
+            print("Misaligned streams detected")
 
         has_something_to_remove = audio_to_remove or sub_to_remove or audio_to_extract or sub_to_extract
         if has_something_to_remove or self.streams_misaligned:
@@ -360,9 +602,20 @@ class MKVFile(object):
         else:
             return False
 
+    def _extract_srt_path(self, track, suffix):
+        """
+        Return the path to extract the given subtitle track to.
+
+        :param Track track: The subtitle track to extract.
+        :param str suffix: Suffix to add after the language code.
+
+        :return: Path of the external subtitle file.
+        :rtype: str
+        """
+        return "{}[edited]{}.{}{}.srt".format(self.edit_prefix, self.edit_suffix, track.language, suffix)
+
     def remove_tracks(self):
         """Remove/extract the unwanted tracks."""
-        command = [cli_args.mkvmerge, "--output"]
         extract_command = [cli_args.mkvextract, self.path, "tracks"]
         
         print("Remuxing:", self.filename)
@@ -373,47 +626,40 @@ class MKVFile(object):
         if cli_args.tmp_dir:
            tmp_path_real = os.path.realpath(cli_args.tmp_dir)
            print(tmp_path_real)
-           tmp_file = u"%s/%s.tmp" % (tmp_path_real, self.filename)
+           # Files with the same name from different directories must not share a temp file
+           dir_hash = hashlib.sha1(self.dirpath.encode("utf8", "surrogateescape")).hexdigest()[:12]
+           tmp_file = u"%s/%s.%s.tmp" % (tmp_path_real, self.filename, dir_hash)
            print(tmp_file)
         else:    
             tmp_file = u"%s.tmp" % self.path
-        
-        command.append(tmp_file)
-        
-        command.extend(["--title", self.filename[:(self.filename.index("[")-1)]])
-        command.extend(["--no-chapters"])
-        command.extend(["--no-attachments"])
-        command.extend(["--no-track-tags"])
-        command.extend(["--disable-track-statistics-tags"])
-        
-        for track in self.video_tracks:
-            command.extend(["--track-name", ":".join((str(track.streamorder)," "))])
-            command.extend(["--language", ":".join((str(track.streamorder),"und"))])
-            self.track_order.extend(str(track.streamorder))
-                
+
+        command = [cli_args.mkvmerge, "--output", tmp_file, "--title", self.title, "--no-chapters",
+                   "--no-attachments", "--no-track-tags", "--disable-track-statistics-tags"]
+
+        # Clear the name & language of the video tracks
+        video_ids = [str(track.streamorder) for track in self.video_tracks]
+        command += [arg for sid in video_ids for arg in ("--track-name", f"{sid}: ", "--language", f"{sid}:und")]
+        self.track_order.extend(video_ids)
+
         # Iterate over all tracks and mark which tracks are to be kept
         for track_type in ("Audio", "Text"):
-            keep, remove, extract = self._filtered_tracks(track_type)
-            sorted_keep =[]
-            keep_ids = []
-            
+            keep, remove, extract = self._filtered_tracks[track_type]
+
+            # Order the tracks by language priority, largest audio or forced subtitles first
             if track_type == "Audio":
-                for lang in cli_args.language:
-                    internal_keep = []
-                    for track in keep:
-                        if track.language == lang:
-                            internal_keep.append(track)
-                    internal_keep.sort(key=lambda x: (x.stream_size is not None, x.stream_size), reverse=True)
-                    sorted_keep.extend(internal_keep)
-            
-            if track_type == "Text":
-                for lang in cli_args.sub_language:
-                    internal_keep = []
-                    for track in keep:
-                        if track.language == lang:
-                            internal_keep.append(track)
-                    internal_keep.sort(key=lambda x: x.forced, reverse=True)
-                    sorted_keep.extend(internal_keep)
+                languages = cli_args.language
+                sort_key = lambda x: (x.stream_size is not None, x.stream_size)
+                track_name = attrgetter("commercial_name")
+                keep_option, none_option = "--audio-tracks", "--no-audio"
+            else:
+                languages = cli_args.sub_language
+                sort_key = attrgetter("forced")
+                track_name = _subtitle_title
+                keep_option, none_option = "--subtitle-tracks", "--no-subtitles"
+
+            for internal_keep in keep.values():
+                internal_keep.sort(key=sort_key, reverse=True)
+            sorted_keep = [track for lang in languages for track in keep.get(lang, ())]
             
             print("Extracting %s track(s):" % track_type)
             if track_type == "Text":
@@ -421,134 +667,214 @@ class MKVFile(object):
                 sdh_sub = False
                 sub_counter = 0
                 for track in extract:
-                    while True:
-                        if track.forced == "Yes" and not forced_sub:
-                            extract_command.extend([":".join((str(track.streamorder),"{}{}{}.{}{}.srt".format(self.path[0:(self.path.index("]") + 1)], "[edited]", self.path[(self.path.index("]")+1):-4], track.language, ".forced")))])
-                            forced_sub = True
-                            break
-                        elif track.title and "sdh" in track.title.lower() and not sdh_sub:
-                            extract_command.extend([":".join((str(track.streamorder),"{}{}{}.{}{}.srt".format(self.path[0:(self.path.index("]") + 1)], "[edited]", self.path[(self.path.index("]")+1):-4], track.language, ".hi")))])
-                            sdh_sub = True
-                            break
-                        else:
-                            extract_command.extend([":".join((str(track.streamorder),"{}{}{}.{}{}{}.srt".format(self.path[0:(self.path.index("]") + 1)], "[edited]", self.path[(self.path.index("]")+1):-4], track.language,"" if sub_counter == 0 else ".","" if sub_counter == 0 else str(sub_counter))))])
-                            sub_counter += 1
-                            break
-                
+                    # The first forced and SDH subtitles are tagged, the others are numbered
+                    if track.forced == "Yes" and not forced_sub:
+                        suffix = ".forced"
+                        forced_sub = True
+                    elif track.title and "sdh" in track.title.lower() and not sdh_sub:
+                        suffix = ".hi"
+                        sdh_sub = True
+                    else:
+                        suffix = ".{}".format(sub_counter) if sub_counter else ""
+                        sub_counter += 1
+
+                    extract_command.append(f"{track.streamorder}:{self._extract_srt_path(track, suffix)}")
                     print("   ", "Track #{}: {} - {}".format(track.streamorder, track.language, track.format))
 
             print("Retaining %s track(s):" % track_type)
-            for count, track in enumerate(sorted_keep):
-                keep_ids.append(str(track.streamorder))
+            for track in sorted_keep:
                 print("   ", "Track #{}: {} - {}".format(track.streamorder, track.language, track.format))
 
-                # Set the first track as default
-                command.extend(["--default-track", ":".join((str(track.streamorder), "0" if count else "1"))])
-            
-                #Set Track names
-                if track_type == "Audio":
-                    command.extend(["--track-name", ":".join((str(track.streamorder),track.commercial_name))])
-                
-                elif track_type == "Text":
-                    command.extend(["--track-name", ":".join((str(track.streamorder),"{}{}{}".format(track.other_language[0], " (Forced)" if track.forced == "Yes" else "", " (SDH)" if track.title and "sdh" in track.title.lower()  else "")))])
-                
+            # Set the first track as default & set the track names
+            keep_ids = [str(track.streamorder) for track in sorted_keep]
+            command += [arg for count, (sid, track) in enumerate(zip(keep_ids, sorted_keep))
+                        for arg in ("--default-track", f"{sid}:{0 if count else 1}",
+                                    "--track-name", f"{sid}:{track_name(track)}")]
+
             # Set which tracks are to be kept
-            if keep_ids and track_type == "Audio":
-                command.extend(["--audio-tracks", ",".join(keep_ids)])
+            if keep_ids:
+                command += [keep_option, ",".join(keep_ids)]
                 self.track_order.extend(keep_ids)
-            elif keep_ids and track_type == "Text":
-                command.extend(["--subtitle-tracks", ",".join(keep_ids)])
-                self.track_order.extend(keep_ids)
-            elif track_type == "Text" and not keep_ids:
-                command.extend(["--no-subtitles"])
-            elif track_type == "Audio" and not keep_ids:
-                command.extend(["--no-audio"])
-                 
+            else:
+                command.append(none_option)
+
             print("Removing %s track(s):" % track_type)
             for track in remove:
                 print("   ", "Track #{}: {} - {}".format(track.streamorder, track.language, track.format))
 
             print("----------------------------")
 
-        command.extend(["--track-order", "{1}{0}".format(",0:".join(self.track_order), "0:")])
-        command.append(self.path)
+        command += ["--track-order", "0:" + ",0:".join(self.track_order), self.path]
         
-        if len(extract_command) >= 4:
-            edit_file(extract_command)
+        # mkvextract only reads from the source file, so it can run alongside mkvmerge,
+        # but it must be finished before the source file gets replaced
+        extract = start_edit(extract_command) if len(extract_command) >= 4 else None
+        extracted = True
+        try:
+            remuxed = edit_file(command)
+        finally:
+            # Never leave mkvextract running in the background, even if the remux raised
+            if extract:
+                extracted = finish_edit(*extract)
 
-        if edit_file(command):
+        if remuxed and extracted:
             replace_file(tmp_file, self.path)
         else:
             if os.path.exists(tmp_file):
                 os.remove(tmp_file)
-                raise Exception("Remuxing failed, but the file on disk should be OK.")   
+                raise Exception("Remuxing or extracting failed, but the file on disk should be OK.")   
     
+    @property
+    def cleanup_required(self):
+        """
+        Check if any of the track properties need to be cleaned up.
+
+        :return: Return True if cleanup is required else False
+        :rtype: bool
+        """
+        return bool(
+            self.menu_tracks or
+            any(track.title or track.language for track in self.video_tracks) or
+            any(not _same_title(track.title, track.commercial_name) for track in self.audio_tracks) or
+            any(not _same_title(track.title, _subtitle_title(track)) for track in self.subtitle_tracks) or
+            any(not _same_title(track.title, self.title) or track.attachments for track in self.general_tracks) or
+            self.has_track_statistics)
+
+    @property
+    def has_track_statistics(self):
+        """
+        Check if any of the video or audio tracks contain track statistics tags.
+
+        :return: Return True if track statistics tags are found else False
+        :rtype: bool
+        """
+        return any(track.duration_source != "General_Duration" and track.framecount_source != "General_Duration"
+                   for track in self.video_tracks) or \
+            any(track.duration_source != "General_Duration" and track.samplingcount_source != "General_Duration"
+                for track in self.audio_tracks)
+
     def cleanup(self):
         command = [cli_args.mkvpropedit, self.path]
         print("Cleaning Up:", self.filename)
         print("----------------------------")
+
+        # Skip going through every track when there is nothing to clean up
+        if not self.cleanup_required:
+            replace_file(self.path, self.path)
+            print("Nothing to do here - File renamed")
+            print("============================")
+            return
         
         for track in self.video_tracks:
+            selector = f"track:{track.track_id}"
             if track.title:
-                print("Removing title for Track #{} (video)".format(str(track.streamorder)))
-                command.extend(["--edit", ":".join(("track",str(track.track_id))), "--delete", "name"])
+                print("Removing title for Track #{} (video)".format(track.streamorder))
+                command.extend(["--edit", selector, "--delete", "name"])
             if track.language:
-                print("Removing language for Track #{} (video)".format(str(track.streamorder)))
-                command.extend(["--edit", ":".join(("track",str(track.track_id))), "--set", "language=und"])
+                print("Removing language for Track #{} (video)".format(track.streamorder))
+                command.extend(["--edit", selector, "--set", "language=und"])
         
         for track in self.audio_tracks:
-            if track.title != track.commercial_name:
-                print("Setting track title for Track #{} (audio)".format(str(track.streamorder)))
-                command.extend(["--edit", ":".join(("track",str(track.track_id))), "--set", "=".join(("name",track.commercial_name))])
+            if not _same_title(track.title, track.commercial_name):
+                print("Setting track title for Track #{} (audio)".format(track.streamorder))
+                command.extend(["--edit", f"track:{track.track_id}", "--set", f"name={track.commercial_name}"])
         
         for track in self.subtitle_tracks:
-            if track.title != "{}{}".format(track.other_language[0], " [Forced]" if track.forced == "Yes" else ""):
-                print("Setting track title for Track #{} (subtitle)".format(str(track.streamorder)))
-                command.extend(["--edit", ":".join(("track",str(track.track_id))), "--set", "=".join(("name","{}{}{}".format(track.other_language[0], " (Forced)" if track.forced == "Yes" else "", " (SDH)" if track.title and "sdh" in track.title.lower()  else "")))])
+            title = _subtitle_title(track)
+            if not _same_title(track.title, title):
+                print("Setting track title for Track #{} (subtitle)".format(track.streamorder))
+                command.extend(["--edit", f"track:{track.track_id}", "--set", f"name={title}"])
         
         for track in self.general_tracks:
-            if track.title != self.filename[:(self.filename.index("[")-1)]:
+            if not _same_title(track.title, self.title):
                 print("Setting title")
-                command.extend(["--edit", "info", "--set", "title={}".format(self.filename[:(self.filename.index("[")-1)])])
+                command.extend(["--edit", "info", "--set", "title={}".format(self.title)])
             if track.attachments:
                 print("Removing attachments")
-                attachment_list = track.attachments.split(" / ")
-                for attachment in attachment_list:
-                    command.extend(["--delete-attachment", ":".join(("name", attachment))])
+                command += [arg for name in track.attachments.split(" / ") for arg in ("--delete-attachment", f"name:{name}")]
         
         if self.menu_tracks:
             print("Removing chapters")
             command.extend(["-c", ""])
-            
-        
-        track_statistics = False 
-        while track_statistics == False:
-            for track in self.video_tracks:
-                if track.duration_source != "General_Duration" and track.framecount_source != "General_Duration":
-                    track_statistics = True
-            for track in self.audio_tracks:
-                if track.duration_source != "General_Duration" and track.samplingcount_source != "General_Duration":
-                    track_statistics = True
-            break
-
-        if track_statistics == True:
-            print("Removing track statistics tags")
-            command.extend(["--delete-track-statistics-tags"])
-
 
-        if len(command) >= 3:
-            print("----------------------------")
-            if edit_file(command):
-                replace_file(self.path, self.path)
+        if self.has_track_statistics:
+            print("Removing track statistics tags")
+            command.append("--delete-track-statistics-tags")
 
-        else:
+        print("----------------------------")
+        if edit_file(command):
             replace_file(self.path, self.path)
-            print("Nothing to do here - File renamed")
-            print("============================")
-        
-        
         
 
+def _unique_files(paths):
+    """
+    Walk all the given paths, yielding every mkv file only once.
+
+    Overlapping or repeated paths would otherwise cause a file to be processed
+    twice, which in parallel mode means two workers remuxing the same file.
+
+    :param list paths: Files and directories given on the command line.
+
+    :return: Generator of mkv files to process.
+    :rtype: collections.Iterator[str]
+    """
+    seen = set()
+    for path in paths:
+        for mkv_file in walk_directory(os.path.realpath(path)):
+            if mkv_file not in seen:
+                seen.add(mkv_file)
+                yield mkv_file
+
+
+def process_file(mkv_file):
+    """
+    Check the given mkv file and remove unnecessary tracks.
+
+    :param str mkv_file: Path to the mkv file to process.
+    """
+    print("\n============================")
+    print("File:", mkv_file)
+    mkv_obj = MKVFile(mkv_file)
+    if mkv_obj.remux_required:
+        mkv_obj.remove_tracks()
+    else:
+        mkv_obj.cleanup()
+
+
+def _init_worker(args, lock):
+    """
+    Initialize the global state of a worker process.
+
+    :param argparse.Namespace args: The parsed command line arguments.
+    :param lock: Lock guarding stdout between the worker processes.
+    """
+    globals()["cli_args"] = args
+    globals()["output_lock"] = lock
+
+    # Ctrl-C is handled by the main process, workers and the tools they start
+    # ignore it so that files are never left half way through a remux
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _process_one(mkv_file):
+    """
+    Process the given mkv file within a worker process.
+
+    All output is buffered and written out in one go once the
+    file is processed, so that output of parallel jobs is not interleaved.
+
+    :param str mkv_file: Path to the mkv file to process.
+    """
+    buffer = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(buffer):
+            process_file(mkv_file)
+    finally:
+        with output_lock:
+            sys.stdout.write(buffer.getvalue())
+            sys.stdout.flush()
+
+
 @catch_interrupt
 def main(params=None):
     """
@@ -564,32 +890,51 @@ def main(params=None):
     parser.add_argument("--mkvextract", action="store", default=MKVEXTRACT_DEFAULT, metavar="path", help="Path to the mkvedit binary.")
     parser.add_argument("--mkvmerge", action="store", default=MKVMERGE_DEFAULT, metavar="path", help="Path to the mkvmerge binary.")
     parser.add_argument("--mkvpropedit", action="store", default=MKVPROPEDIT_DEFAULT, metavar="path", help="Path to the mkvpropedit binary.")
+    parser.add_argument("--cache-dir", action="store", default=CACHE_DIR_DEFAULT, metavar="path", help="Path for caching the parsed mediainfo results.")
     parser.add_argument("--tmp-dir", action="store", default=None, metavar="path", help="Custom Path for temporary files, if it does not exist it is created")
     parser.add_argument("-l", "--language",  action=AppendSplitter, default=None, required=True, metavar="language", help="Comma-separated list of ISO 639-1 compliant language codes defining the audio languages to retain.")
     parser.add_argument("-s", "--sub-language", action=AppendSplitter, default=None, required=True, metavar="language", help="Comma-separated list of ISO 639-1 compliant language codes defining the subtitle languages to retain.")
     parser.add_argument("-f", "--sub-forced", action="store_true", default=False, help="When enabled only forced subtitles are kept.")
     parser.add_argument("--min-age", action="store", default=MIN_AGE_DEFAULT,type=int, help="Specifies minimal age in hours (int) for files to get parsed")
     parser.add_argument("-e", "--external-subtitles", action="store_true", default=False, help="Store subtitles externally.")
+    parser.add_argument("-j", "--jobs", action="store", default=JOBS_DEFAULT, type=int, metavar="N", help="Number of files to process in parallel.")
     parser.add_argument("-d", "--dry-run", action="store_true", default=False, help="Dry run for testing.")
     parser.add_argument("-v", "--verbose", action="store_true", default=False, help="Verbose output.")
 
     # Parse the list of given arguments
     globals()["cli_args"] = parser.parse_args(params)
 
+    # Languages to retain in order of priority, without duplicates,
+    # along with sets of the same languages for fast lookups
+    cli_args.language = tuple(dict.fromkeys(cli_args.language))
+    cli_args.sub_language = tuple(dict.fromkeys(cli_args.sub_language))
+    cli_args.language_set = frozenset(cli_args.language)
+    cli_args.sub_language_set = frozenset(cli_args.sub_language)
+
     # Iterate over all found mkv files
     print("Searching for MKV files to process.")
     print("Warning: This may take some time...")
-    for path in cli_args.paths:
-        path = os.path.realpath(path)
-        for mkv_file in walk_directory(path):
-            print("\n============================")
-            print("File:", mkv_file)
-            mkv_obj = MKVFile(mkv_file)
-            if mkv_obj.remux_required:
-                mkv_obj.remove_tracks()
-            else:
-                mkv_obj.cleanup()
-            
+    mkv_files = _unique_files(cli_args.paths)
+    if cli_args.jobs > 1:
+        # Worker processes don't share our globals, so the parsed arguments are passed to them explicitly
+        lock = multiprocessing.Lock()
+        with ProcessPoolExecutor(cli_args.jobs, initializer=_init_worker, initargs=(cli_args, lock)) as executor:
+            futures = [executor.submit(_process_one, mkv_file) for mkv_file in mkv_files]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                # Drop the pending files, while the files in progress are finished safely
+                executor.shutdown(wait=False, cancel_futures=True)
+                running = sum(not future.done() for future in futures)
+                with lock:
+                    print("\nInterrupted, waiting for %d running file(s) to finish..." % running)
+                    sys.stdout.flush()
+                raise
+    else:
+        for mkv_file in mkv_files:
+            process_file(mkv_file)
+
 
 if __name__ == "__main__":
     main()